@@ -1,10 +1,50 @@
 import os
+import sys
+import codecs
 import shutil
 import subprocess
 import logging
-from pathlib import Path
-import mimetypes
+import posixpath
+import hashlib
 from urllib.parse import urlparse
+from collections import deque
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+try:
+    import pygit2  # Optional: clone and read blobs in-process through libgit2
+except ImportError:
+    pygit2 = None
+
+
+# Extensions that are skipped as binary without opening the file
+_BINARY_EXTS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.pdf', '.zip', '.tar', '.gz', '.exe', '.so', '.dll', '.o', '.a', '.class'})
+
+# Leading bytes of common binary formats: ELF, PNG, ZIP/JAR, JPEG, PDF, GIF, gzip.
+# PE's "MZ" is left out since text can start with it; the NULs in its DOS header give it away.
+_MAGICS = (b'\x7fELF', b'\x89PNG', b'PK\x03\x04', b'\xff\xd8\xff', b'%PDF', b'GIF8', b'\x1f\x8b\x08')
+
+# Output is written through a large buffer so the many small banner writes don't each hit the disk
+_OUTPUT_BUFFER_SIZE = 1024 * 1024
+_IOV_MAX = os.sysconf("SC_IOV_MAX") if "SC_IOV_MAX" in getattr(os, "sysconf_names", {}) else 1024
+
+# Per-file banner, formatted and written in one call
+_SEP = "=" * 80 + "\n"
+_HEADER_FORMAT = (_SEP + "File: {0}\nSize: {1:.2f} KB\n" + _SEP + "\n").format
+_DUPLICATE_FORMAT = "(identical to {0})\n".format
+
+# Files larger than this are copied from disk to the output instead of being read into memory
+_STREAM_THRESHOLD = 1024 * 1024
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+# Most files that may be read but not yet written at once; each is under _STREAM_THRESHOLD in memory
+_MAX_PENDING_FILES = 256
+
+# Readahead hints are only available on POSIX platforms that implement posix_fadvise
+_HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+# Directories that are never descended into: VCS metadata, dependencies, caches and build output
+_SKIP_DIRS = frozenset({'node_modules', '.git', '.venv', 'venv', '__pycache__', '.mypy_cache', '.pytest_cache', 'dist', 'build', 'target', '.next', '.svelte-kit'})
 
 
 def normalize_github_url(url):
@@ -32,18 +72,37 @@ def normalize_github_url(url):
 
 
 def download_repository(repo_url, temp_dir):
-    """Downloads a GitHub repository to a temporary directory."""
+    """Downloads a GitHub repository as a bare repository into a temporary directory."""
     try:
         normalized_url = normalize_github_url(repo_url)
 
         logging.info(f"Downloading repository from {normalized_url} to {temp_dir}")
 
-        # Clone the repository using git
-        subprocess.run(["git", "clone", "--depth", "1", normalized_url, temp_dir], check=True, capture_output=True)
+        cloned = False
+        if pygit2 is not None:
+            # Clone in-process through libgit2, bare and shallow, without forking git.
+            # SSH remotes authenticate through ssh-agent, as the git command would.
+            callbacks = None
+            if normalized_url.startswith('git@'):
+                callbacks = pygit2.RemoteCallbacks(credentials=pygit2.KeypairFromAgent("git"))
+            try:
+                pygit2.clone_repository(normalized_url, temp_dir, bare=True, depth=1, callbacks=callbacks)
+                cloned = True
+            except Exception as e:  # GitError, or TypeError from a pygit2 too old for depth=
+                logging.warning(f"pygit2 clone failed ({e}), falling back to git")
+                shutil.rmtree(temp_dir, ignore_errors=True)
 
-        # Verify the download
-        if not os.listdir(temp_dir):
-            raise Exception("Repository appears to be empty")
+        if not cloned:
+            # Clone only the tip of the default branch, bare, so no working tree is written to disk.
+            # No --filter=blob:none here: without a checkout, git would fetch every blob lazily, one round trip each.
+            # GIT_TERMINAL_PROMPT=0 makes git fail instead of waiting for credentials on private/missing repos.
+            subprocess.run(["git", "-c", "protocol.version=2", "clone", "--bare", "--depth", "1", "--single-branch",
+                            "--no-tags", normalized_url, temp_dir],
+                           check=True, capture_output=True, env={**os.environ, "GIT_TERMINAL_PROMPT": "0"})
+
+        # Verify the download: a bare clone always has HEAD and config, but an empty repository has no commit
+        if _head_is_unborn(temp_dir):
+            logging.warning("Repository appears to be empty")
 
         logging.info("Repository downloaded successfully.")
     except subprocess.CalledProcessError as e:
@@ -52,72 +111,478 @@ def download_repository(repo_url, temp_dir):
         raise Exception("Failed to download repository.") from e
 
 
-def is_text_file(filepath):
-    """Determine if a file is text or binary based on its content type."""
-    mime_type, _ = mimetypes.guess_type(filepath)
-    if mime_type is None:
-      # If mime type is unknown assume it's text based on the extension.  This is not perfect.
-      ext = Path(filepath).suffix.lower()
-      text_extensions = ['.txt', '.js', '.py', '.html', '.css', '.md', '.json', '.xml', '.yaml', '.yml', '.c', '.cpp', '.h', '.hpp', '.java', '.go', '.sh', '.rb', '.php']  # common text extensions.
-      return ext in text_extensions
+def is_binary(head):
+    """Determine if a file is binary from its first bytes: a known magic number or a NUL byte, as git checks."""
+    return head.startswith(_MAGICS) or b'\x00' in head[:4096]
+
+
+class _GatherWriter:
+    """Collects output chunks and hands them to os.writev once about _OUTPUT_BUFFER_SIZE bytes are pending.
+
+    Unlike io.BufferedWriter the chunks are not copied into an intermediate buffer first, so a file's
+    header, contents and trailing newline go out in the same gather write without being joined.
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data):
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._size >= _OUTPUT_BUFFER_SIZE or len(self._chunks) >= _IOV_MAX:
+            self.flush()
+        return len(data)
 
-    return mime_type.startswith('text/')
+    def flush(self):
+        chunks = self._chunks
+        fd = self._raw.fileno()
+        start = 0
+        while start < len(chunks):
+            written = os.writev(fd, chunks[start:])
+            # Skip the chunks that went out completely and trim the one that was cut short
+            while start < len(chunks) and written >= len(chunks[start]):
+                written -= len(chunks[start])
+                start += 1
+            if written:
+                chunks[start] = memoryview(chunks[start])[written:]
+        self._chunks = []
+        self._size = 0
+
+    def fileno(self):
+        return self._raw.fileno()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self.flush()
+        finally:
+            self._raw.close()
+
+
+def _open_output(output_file):
+    """Opens the output file for binary writing, gathering writes with os.writev where the platform has it."""
+    if hasattr(os, "writev"):
+        return _GatherWriter(open(output_file, "wb", buffering=0))
+    return open(output_file, "wb", buffering=_OUTPUT_BUFFER_SIZE)
+
+
+def _write_header(outfile, relative_path, file_size):
+    """Writes the banner that precedes each file's contents in the output."""
+    outfile.write(_HEADER_FORMAT(relative_path, file_size / 1024).encode("utf-8"))
+
+
+def _scan_files(repo_dir):
+    """Walks the repository with os.scandir and returns a list of (filepath, file_size, ext) tuples."""
+    candidates = []
+    stack = [repo_dir]
+
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            # Prune skipped directories before they are listed; files that happen
+                            # to share such a name are kept.
+                            if entry.name not in _SKIP_DIRS:
+                                stack.append(entry.path)
+                        elif entry.is_file():
+                            # Symlinked files are read through to their target, as os.walk listed them.
+                            # The DirEntry caches its stat result, so this is the only stat per file
+                            candidates.append((entry.path, entry.stat().st_size,
+                                               os.path.splitext(entry.name)[1].lower()))
+                        elif entry.is_symlink() and not entry.is_dir():
+                            logging.error(f"Error processing {entry.name}: broken symlink")
+                    except OSError as e:
+                        logging.error(f"Error processing {entry.name}: {e}")
+        except OSError as e:
+            logging.error(f"Error reading directory: {e}")
+
+    return candidates
+
+
+def _looks_like_utf8(head):
+    """Cheap UTF-8 check on a file prefix. A multi-byte sequence cut off at the end of the prefix is not an error."""
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
 
 
-def process_files(repo_dir, output_file, threshold_mb, include_all):
-    """Processes files in the repository directory and combines them into a single text output."""
+def _copy_file(infile, file_size, outfile):
+    """Appends the open file's contents to outfile with os.sendfile on Linux, falling back to a chunked shutil.copyfileobj."""
+    # Anything still buffered has to reach the descriptor before the kernel writes after it
+    outfile.flush()
+
+    if _HAS_FADVISE:
+        os.posix_fadvise(infile.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+    try:
+        if sys.platform.startswith("linux"):
+            offset = 0
+            try:
+                while offset < file_size:
+                    sent = os.sendfile(outfile.fileno(), infile.fileno(), offset, file_size - offset)
+                    if sent == 0:  # File shrank since it was scanned
+                        break
+                    offset += sent
+                return
+            except OSError:
+                # Not every filesystem supports sendfile; stream the rest instead
+                infile.seek(offset)
+
+        # Stream in fixed-size chunks so memory stays bounded regardless of file size
+        shutil.copyfileobj(infile, outfile, _COPY_CHUNK_SIZE)
+    finally:
+        # The file won't be read again, so don't let it crowd the page cache
+        if _HAS_FADVISE:
+            os.posix_fadvise(infile.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def _read_one(filepath, file_size, prefix_len, include_all, dedup):
+    """Reads a single file for process_files. Returns (filepath, relative_path, file_size, content, digest), or None if skipped.
+
+    content is None for files above _STREAM_THRESHOLD, which are copied straight from disk instead.
+    digest is the content hash used to spot duplicates, or None when not deduplicating this file.
+    """
+    filename = os.path.basename(filepath)
+
+    try:
+        with open(filepath, "rb") as infile:
+            if _HAS_FADVISE:
+                os.posix_fadvise(infile.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            head = infile.read(4096)
+
+            # Skip binary files unless includeAll is true. Sniffing the content keeps extensionless
+            # text (Makefile, Dockerfile), and the same read serves the decode.
+            if not include_all and is_binary(head):
+                logging.debug(f"Skipping binary file: {filename}")
+                return None
+
+            # Large files are only validated on their prefix and copied in the kernel by _copy_file
+            if file_size > _STREAM_THRESHOLD:
+                if not _looks_like_utf8(head):  # Handle files that are not valid UTF-8
+                    logging.warning(f"Skipping file due to UTF-8 decode error: {filename}")
+                    return None
+
+                # Start readahead now so the pages are cached by the time the writer copies them
+                if _HAS_FADVISE:
+                    os.posix_fadvise(infile.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                return filepath, filepath[prefix_len:], file_size, None, None
+
+            content = head + infile.read()
+            if _HAS_FADVISE:
+                os.posix_fadvise(infile.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+        try:
+            content.decode("utf-8")
+        except UnicodeDecodeError:  # Handle files that are not valid UTF-8
+            logging.warning(f"Skipping file due to UTF-8 decode error: {filename}")
+            return None
+
+        # Hash here so it runs in parallel; empty files are left alone as they'd all match
+        digest = hashlib.blake2b(content, digest_size=16).digest() if dedup and content else None
+
+        return filepath, filepath[prefix_len:], file_size, content, digest
+
+    except Exception as e:
+        logging.error(f"Error processing {filename}: {e}")
+        return None
+
+
+def _read_batch(batch, prefix_len, include_all, dedup):
+    """Runs _read_one over a list of (filepath, file_size) pairs."""
+    return [_read_one(filepath, file_size, prefix_len, include_all, dedup) for filepath, file_size in batch]
+
+
+def _map_bounded(executor, window, fn, items, *args):
+    """Yields fn(item, *args) for each item in order, like executor.map, but with at most window calls pending."""
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item, *args))
+
+    while pending:
+        yield pending.popleft().result()
+
+
+def process_files(repo_dir, output_file, threshold_mb, include_all, processes=False, dedup=True):
+    """Processes files in the repository directory and combines them into a single text output.
+
+    With processes=True files are read and decoded in worker processes instead of threads, which
+    sidesteps the GIL on very large repositories at the cost of sending file contents over IPC.
+    With dedup=True a file whose contents match an earlier one is written as a pointer to it.
+    """
     threshold_bytes = threshold_mb * 1024 * 1024
     total_processed_files = 0
     total_skipped_files = 0
 
     try:
-        with open(output_file, "w", encoding="utf-8") as outfile:
-            for root, dirs, files in os.walk(repo_dir):
+        # Reject what the walk already tells us about (size, extension) before opening anything
+        candidates = []
+        for filepath, file_size, ext in _scan_files(repo_dir):
+            if not include_all:
+                # Skip if file is too large and include_all is False
+                if file_size > threshold_bytes:
+                    logging.debug(f"Skipping large file: {os.path.basename(filepath)}")
+                    total_skipped_files += 1
+                    continue
+
+                # Skip files that are binary by extension without sniffing them
+                if ext in _BINARY_EXTS:
+                    logging.debug(f"Skipping binary file: {os.path.basename(filepath)}")
+                    total_skipped_files += 1
+                    continue
+
+            candidates.append((filepath, file_size))
 
-                # Skip node_modules directories
-                if "node_modules" in root:
+        # Every scanned path starts with repo_dir + os.sep, so slicing replaces os.path.relpath
+        prefix_len = len(os.fspath(repo_dir).rstrip(os.sep)) + 1
+
+        if processes:
+            # Hand each worker a batch of files so the IPC round trip is amortized, shrinking batches
+            # on many-core hosts so the two in flight per worker stay within _MAX_PENDING_FILES
+            max_workers = os.cpu_count() or 1
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+            batch_size = max(1, min(64, _MAX_PENDING_FILES // (max_workers * 2)))
+            window = max(1, min(max_workers * 2, _MAX_PENDING_FILES // batch_size))
+        else:
+            # Reads are I/O bound, so overlap them on a thread pool and keep writing on this thread.
+            max_workers = min(32, (os.cpu_count() or 1) * 4)
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            batch_size = 1
+            window = max_workers * 2
+
+        batches = [candidates[i:i + batch_size] for i in range(0, len(candidates), batch_size)]
+
+        with _open_output(output_file) as outfile, executor:
+            # Keep up to two batches per worker in flight, and no more than _MAX_PENDING_FILES files:
+            # enough to keep them busy, and file contents waiting on the writer stay bounded
+            # instead of piling up when the output is slow.
+            results = chain.from_iterable(_map_bounded(executor, window, _read_batch, batches,
+                                                       prefix_len, include_all, dedup))
+            seen = {}  # digest -> relative path of the first file written with those contents
+
+            for result in results:
+                if result is None:
+                    total_skipped_files += 1
                     continue
-                
-                for filename in files:
-                    filepath = os.path.join(root, filename)
-                    
+
+                filepath, relative_path, file_size, content, digest = result
+
+                # Open a streamed file before its banner is written: the worker checked it a while ago,
+                # and one deleted or made unreadable since then should be skipped, not left half written.
+                infile = None
+                if content is None:
                     try:
-                        file_size = os.path.getsize(filepath)
-
-                        # Skip if file is too large and include_all is False
-                        if not include_all and file_size > threshold_bytes:
-                            logging.debug(f"Skipping large file: {filename}")
-                            total_skipped_files += 1
-                            continue
-
-                        # Skip binary files unless includeAll is true
-                        if not include_all and not is_text_file(filepath):
-                            logging.debug(f"Skipping binary file: {filename}")
-                            total_skipped_files += 1
-                            continue
-
-                        try:
-                            with open(filepath, "r", encoding="utf-8") as infile:
-                                content = infile.read()
-                        except UnicodeDecodeError:  # Handle files that are not valid UTF-8
-                            logging.warning(f"Skipping file due to UTF-8 decode error: {filename}")
-                            total_skipped_files += 1
-                            continue
-
-                        relative_path = os.path.relpath(filepath, repo_dir)
-
-                        outfile.write("=" * 80 + "\n")
-                        outfile.write(f"File: {relative_path}\n")
-                        outfile.write(f"Size: {file_size / 1024:.2f} KB\n")
-                        outfile.write("=" * 80 + "\n\n")
-                        outfile.write(content + "\n")
+                        infile = open(filepath, "rb")
+                    except OSError as e:
+                        logging.error(f"Error processing {os.path.basename(relative_path)}: {e}")
+                        total_skipped_files += 1
+                        continue
+
+                try:
+                    _write_header(outfile, relative_path, file_size)
+                    if digest in seen:
+                        outfile.write(_DUPLICATE_FORMAT(seen[digest]).encode("utf-8"))
+                    elif infile is not None:
+                        _copy_file(infile, file_size, outfile)
+                    else:
+                        outfile.write(content)
+                        if digest is not None:
+                            seen[digest] = relative_path
+                    outfile.write(b"\n")
+
+                    total_processed_files += 1
+                    logging.debug(f"Processed file: {relative_path}")
+
+                except Exception as e:
+                    logging.error(f"Error processing {os.path.basename(relative_path)}: {e}")
+                    total_skipped_files += 1
+
+                finally:
+                    if infile is not None:
+                        infile.close()
+
+        logging.info(f"Processed {total_processed_files} files successfully ({total_skipped_files} skipped)")
+
+    except Exception as e:
+        logging.error(f"Failed to process files: {e}")
+        raise
+
+
+def _head_is_unborn(git_dir):
+    """True if HEAD of the repository points at no commit yet, as in a freshly created empty repository."""
+    if pygit2 is not None:
+        return pygit2.Repository(git_dir).head_is_unborn
+    return subprocess.run(["git", "--git-dir", git_dir, "rev-parse", "--verify", "--quiet", "HEAD"],
+                          capture_output=True).returncode != 0
+
+
+def _ls_tree(git_dir):
+    """Lists the files at HEAD of a bare repository as (relative_path, oid, file_size) tuples."""
+    # An empty repository has no tree to list, and produces an empty output as the working tree walk would
+    if _head_is_unborn(git_dir):
+        return []
+
+    if pygit2 is not None:
+        return _ls_tree_pygit2(pygit2.Repository(git_dir))
+
+    result = subprocess.run(["git", "--git-dir", git_dir, "ls-tree", "-r", "-l", "-z", "HEAD"],
+                            check=True, capture_output=True)
+
+    entries = []
+    for record in result.stdout.split(b"\0"):
+        if not record:
+            continue
+
+        meta, _, path = record.partition(b"\t")
+        mode, object_type, oid, size = meta.split()
+
+        # Skip submodules and symlinks, as the working tree walk does
+        if object_type != b"blob" or mode == b"120000":
+            continue
+
+        relative_path = os.fsdecode(path)
+
+        # Skip files under the same directories the working tree walk prunes
+        if not _SKIP_DIRS.isdisjoint(relative_path.split("/")[:-1]):
+            continue
+
+        entries.append((relative_path, oid.decode("ascii"), int(size)))
+
+    return entries
+
+
+def _ls_tree_pygit2(repo, tree=None, prefix=""):
+    """pygit2 version of _ls_tree, walking the trees in the same order git ls-tree -r lists them."""
+    if tree is None:
+        tree = repo.head.peel(pygit2.Tree)
+
+    odb = repo.odb
+    entries = []
+    for entry in tree:
+        if entry.type_str == "tree":
+            # Skip the same directories the working tree walk prunes
+            if entry.name in _SKIP_DIRS:
+                continue
+            entries.extend(_ls_tree_pygit2(repo, repo[entry.id], prefix + entry.name + "/"))
+        # Skip submodules and symlinks, as the working tree walk does
+        elif entry.type_str == "blob" and entry.filemode != 0o120000:
+            entries.append((prefix + entry.name, str(entry.id), _blob_size(repo, odb, entry.id)))
+
+    return entries
+
+
+def _blob_size(repo, odb, oid):
+    """Size of a blob from its odb header, without loading and inflating the whole object."""
+    if hasattr(odb, "read_header"):
+        return odb.read_header(oid)[1]
+    return repo[oid].size  # pygit2 without Odb.read_header
+
+
+def _read_blobs(git_dir, entries):
+    """Yields (relative_path, oid, file_size, content) for each entry, with content None if the object is missing."""
+    if pygit2 is not None:
+        repo = pygit2.Repository(git_dir)
+        for relative_path, oid, file_size in entries:
+            yield relative_path, oid, file_size, repo[oid].data
+        return
+
+    with subprocess.Popen(["git", "--git-dir", git_dir, "cat-file", "--batch"],
+                          stdin=subprocess.PIPE, stdout=subprocess.PIPE) as cat_file:
+        for relative_path, oid, file_size in entries:
+            # Each request answers with "<oid> blob <size>\n<contents>\n"
+            cat_file.stdin.write(oid.encode("ascii") + b"\n")
+            cat_file.stdin.flush()
+            header = cat_file.stdout.readline().split()
+            if len(header) != 3:
+                yield relative_path, oid, file_size, None
+                continue
+            yield relative_path, oid, file_size, cat_file.stdout.read(int(header[2]) + 1)[:-1]
+
+
+def process_bare_repository(git_dir, output_file, threshold_mb, include_all, dedup=True):
+    """Processes the files at HEAD of a bare repository, reading their contents with pygit2 or git cat-file --batch.
+
+    With dedup=True a file whose blob matches an earlier one is written as a pointer to it.
+    """
+    threshold_bytes = threshold_mb * 1024 * 1024
+    total_processed_files = 0
+    total_skipped_files = 0
+
+    try:
+        # Reject what the tree listing already tells us about (size, extension) before reading any blob
+        entries = []
+        for relative_path, oid, file_size in _ls_tree(git_dir):
+            if not include_all:
+                # Skip if file is too large and include_all is False
+                if file_size > threshold_bytes:
+                    logging.debug(f"Skipping large file: {posixpath.basename(relative_path)}")
+                    total_skipped_files += 1
+                    continue
+
+                # Skip files that are binary by extension without sniffing them
+                if posixpath.splitext(relative_path)[1].lower() in _BINARY_EXTS:
+                    logging.debug(f"Skipping binary file: {posixpath.basename(relative_path)}")
+                    total_skipped_files += 1
+                    continue
+
+            entries.append((relative_path, oid, file_size))
+
+        with _open_output(output_file) as outfile:
+            seen = {}  # oid -> relative path of the first file written with that blob
+
+            for relative_path, oid, file_size, content in _read_blobs(git_dir, entries):
+                filename = posixpath.basename(relative_path)
+
+                try:
+                    # Git already addresses blobs by content hash, so identical files share an oid
+                    if oid in seen:
+                        _write_header(outfile, relative_path, file_size)
+                        outfile.write(_DUPLICATE_FORMAT(seen[oid]).encode("utf-8"))
+                        outfile.write(b"\n")
 
                         total_processed_files += 1
-                        logging.debug(f"Processed file: {relative_path}")
+                        logging.debug(f"Processed duplicate file: {relative_path}")
+                        continue
 
-                    except Exception as e:
-                        logging.error(f"Error processing {filename}: {e}")
+                    if content is None:
+                        logging.error(f"Error processing {filename}: object is missing")
                         total_skipped_files += 1
+                        continue
+
+                    # Skip binary files unless includeAll is true
+                    if not include_all and is_binary(content):
+                        logging.debug(f"Skipping binary file: {filename}")
+                        total_skipped_files += 1
+                        continue
+
+                    try:
+                        content.decode("utf-8")
+                    except UnicodeDecodeError:  # Handle files that are not valid UTF-8
+                        logging.warning(f"Skipping file due to UTF-8 decode error: {filename}")
+                        total_skipped_files += 1
+                        continue
+
+                    _write_header(outfile, relative_path, file_size)
+                    outfile.write(content)
+                    outfile.write(b"\n")
+                    if dedup and content:
+                        seen[oid] = relative_path
+
+                    total_processed_files += 1
+                    logging.debug(f"Processed file: {relative_path}")
+
+                except Exception as e:
+                    logging.error(f"Error processing {filename}: {e}")
+                    total_skipped_files += 1
 
         logging.info(f"Processed {total_processed_files} files successfully ({total_skipped_files} skipped)")
 